@@ -7,15 +7,55 @@ OBINexus Computing Project
 Integrates NSIGII consensus for decentralized cost-shared connectivity
 """
 
+import os
+import sys
 import time
 import math
+import logging
+import struct
 import hashlib
 import secrets
-from enum import Enum
+from enum import Enum, IntEnum
 from dataclasses import dataclass, field
-from typing import List, Optional, Dict
+from typing import List, Optional, Dict, Final
 from datetime import datetime, timedelta
 
+try:
+    import numpy as np
+except ImportError:  # Pure-Python fallback when NumPy is unavailable
+    np = None
+
+try:
+    from numba import njit
+except ImportError:  # Numba is optional; pure-Python loop is used instead
+    njit = None
+
+logger = logging.getLogger("blueshare")
+
+# USD → Satoshi conversion (assuming $40,000/BTC, 100M sat/BTC)
+_BTC_PER_USD_SATOSHI = (1.0 / 40000.0) * 100_000_000
+
+# Physics-based cost model: Work = F × d × cos(θ), priced per joule
+#   F = 1.25 N, d = 15.0 m, cos(30°) = 0.866, $0.00001/J microtransaction rate
+_USD_PER_MB: Final[float] = 1.25 * 15.0 * 0.866 * 0.00001
+
+# Bytes → megabytes as a multiply
+_INV_MB: Final[float] = 1.0 / (1024 * 1024)
+
+
+if np is not None and njit is not None:
+    @njit(cache=True)
+    def _entropy_kernel(samples):
+        """Shannon-style entropy of uint8 noise samples (JIT-compiled)"""
+        s = 0.0
+        for i in range(samples.shape[0]):
+            p = samples[i] / 255.0
+            if p > 0:
+                s -= p * math.log2(p)
+        return s
+else:
+    _entropy_kernel = None
+
 
 # ============================================================================
 # NSIGII Protocol Integration
@@ -37,12 +77,12 @@ class NetworkTopology(Enum):
     HYBRID = "hybrid"
 
 
-class DeviceRole(Enum):
+class DeviceRole(IntEnum):
     """Device role in network"""
-    HOST = "host"
-    CLIENT = "client"
-    RELAY = "relay"
-    OBSERVER = "observer"
+    HOST = 0
+    CLIENT = 1
+    RELAY = 2
+    OBSERVER = 3
 
 
 class PaymentState(Enum):
@@ -54,7 +94,11 @@ class PaymentState(Enum):
     FAILED = "failed"
 
 
-@dataclass
+# Signal-strength wording for consent decisions in the NSIGII log
+_SIGNAL_LABELS = {State.YES: "strong", State.NO: "weak", State.MAYBE: "marginal"}
+
+
+@dataclass(slots=True)
 class NSIGIIConsent:
     """NSIGII consensus state for device participation"""
     state: State
@@ -63,17 +107,23 @@ class NSIGIIConsent:
     
     def measure_channel_entropy(self) -> float:
         """Measure real entropy from system noise"""
-        noise_samples = [secrets.randbits(8) for _ in range(64)]
-        entropy = 0.0
-        for sample in noise_samples:
-            p = sample / 255.0
-            if p > 0:
-                entropy -= p * math.log2(p)
+        if _entropy_kernel is not None:
+            samples = np.frombuffer(secrets.token_bytes(64), dtype=np.uint8)
+            entropy = float(_entropy_kernel(samples))
+        else:
+            # Pure-Python fallback: one urandom read, log2 bound as a local
+            log2 = math.log2
+            noise_samples = os.urandom(64)
+            entropy = 0.0
+            for sample in noise_samples:
+                p = sample / 255.0
+                if p > 0:
+                    entropy -= p * log2(p)
         self.entropy = entropy
         return entropy
 
 
-@dataclass
+@dataclass(slots=True)
 class LightningPayment:
     """Lightning Network payment details"""
     invoice: str
@@ -84,32 +134,57 @@ class LightningPayment:
     status: PaymentState = PaymentState.PENDING
     
     @classmethod
-    def create(cls, amount_usd: float) -> 'LightningPayment':
-        """Generate Lightning invoice for micropayment"""
-        # Convert USD to Satoshi (assuming $40,000/BTC)
-        btc_per_usd = 1.0 / 40000.0
-        satoshi_per_btc = 100_000_000
-        amount_sat = int(amount_usd * btc_per_usd * satoshi_per_btc)
+    def create(cls, amount_usd: float, now: Optional[datetime] = None) -> 'LightningPayment':
+        """Generate Lightning invoice for micropayment
         
-        # Generate payment hash
-        payment_hash = hashlib.sha256(
-            f"{amount_usd}{time.time()}".encode()
-        ).hexdigest()
+        `now` lets batch callers share one timestamp for invoice expiry.
+        """
+        if now is None:
+            now = datetime.now()
         
-        # Simplified BOLT11 invoice
-        invoice = f"lnbc{amount_sat}u1p{payment_hash[:10]}..."
+        # Generate payment hash from packed (amount, time) bytes
+        buf = struct.pack('<dd', amount_usd, time.time())
+        return cls._from_digest(amount_usd, hashlib.sha256(buf).digest(), now)
+    
+    @classmethod
+    def create_batch(cls, amounts_usd: List[float],
+                     now: Optional[datetime] = None) -> List['LightningPayment']:
+        """Generate Lightning invoices for many micropayments at once
+        
+        All amounts are committed to a single root hash; each invoice's
+        payment hash is derived from the root and its index in the batch.
+        """
+        if now is None:
+            now = datetime.now()
+        
+        n = len(amounts_usd)
+        root = hashlib.sha256(struct.pack(f'<{n}dd', *amounts_usd, time.time())).digest()
+        
+        return [
+            cls._from_digest(amount_usd, hashlib.sha256(root + i.to_bytes(4, 'little')).digest(), now)
+            for i, amount_usd in enumerate(amounts_usd)
+        ]
+    
+    @classmethod
+    def _from_digest(cls, amount_usd: float, digest: bytes, now: datetime) -> 'LightningPayment':
+        """Build an authorized invoice around a precomputed payment digest"""
+        # Convert USD to Satoshi
+        amount_sat = int(amount_usd * _BTC_PER_USD_SATOSHI)
+        
+        # Simplified BOLT11 invoice (first 5 digest bytes = 10 hex chars)
+        invoice = f"lnbc{amount_sat}u1p{digest[:5].hex()}..."
         
         return cls(
             invoice=invoice,
             amount_satoshi=amount_sat,
             amount_usd=amount_usd,
-            payment_hash=payment_hash,
-            expiry=datetime.now() + timedelta(minutes=10),
+            payment_hash=digest.hex(),
+            expiry=now + timedelta(minutes=10),
             status=PaymentState.AUTHORIZED
         )
 
 
-@dataclass
+@dataclass(slots=True)
 class DeviceNode:
     """Network device with Bluetooth and payment capabilities"""
     device_id: str
@@ -141,32 +216,43 @@ class DeviceNode:
     
     def mb_used(self) -> float:
         """Calculate total data usage in megabytes"""
-        return (self.bytes_sent + self.bytes_received) / (1024 * 1024)
+        return (self.bytes_sent + self.bytes_received) * _INV_MB
     
-    def request_consent(self, request_type: str) -> State:
-        """Request device participation using NSIGII protocol"""
-        print(f"[NSIGII] Requesting {request_type} consent from {self.device_name}")
+    def request_consent(self, request_type: str, now: Optional[datetime] = None) -> State:
+        """Request device participation using NSIGII protocol
         
+        `now` lets bulk consent generation share one timestamp.
+        """
         # Consent logic based on signal strength
         if self.rssi > -70:
             state = State.YES
-            print(f"[NSIGII] {self.device_name}: YES (strong signal {self.rssi} dBm)")
         elif self.rssi < -90:
             state = State.NO
-            print(f"[NSIGII] {self.device_name}: NO (weak signal {self.rssi} dBm)")
         else:
             state = State.MAYBE
-            print(f"[NSIGII] {self.device_name}: MAYBE (marginal signal {self.rssi} dBm)")
-        
-        self.consent = NSIGIIConsent(state=state)
-        if state == State.MAYBE:
-            self.consent.measure_channel_entropy()
-            print(f"[NSIGII] θ entropy: {self.consent.entropy:.4f} bits")
         
+        self._record_consent(request_type, state, now)
         return state
+    
+    def _record_consent(self, request_type: str, state: State, now: Optional[datetime]):
+        """Store a consent decision, sampling θ entropy for MAYBE"""
+        debug = logger.isEnabledFor(logging.DEBUG)
+        if debug:
+            logger.debug("[NSIGII] Requesting %s consent from %s", request_type, self.device_name)
+            logger.debug("[NSIGII] %s: %s (%s signal %s dBm)",
+                         self.device_name, state.name, _SIGNAL_LABELS[state], self.rssi)
+        
+        if now is None:
+            self.consent = NSIGIIConsent(state=state)
+        else:
+            self.consent = NSIGIIConsent(state=state, timestamp=now)
+        if state is State.MAYBE:
+            self.consent.measure_channel_entropy()
+            if debug:
+                logger.debug("[NSIGII] θ entropy: %.4f bits", self.consent.entropy)
 
 
-@dataclass
+@dataclass(slots=True)
 class BlueShareSession:
     """BlueShare network session with constitutional compliance"""
     session_id: str
@@ -191,147 +277,173 @@ class BlueShareSession:
     fairness_verified: bool = False
     privacy_verified: bool = False
     
+    def request_consent_all(self, request_type: str) -> List[State]:
+        """Request NSIGII consent from every device in one batched pass"""
+        now = datetime.now()
+        if np is None:
+            return [d.request_consent(request_type, now=now) for d in self.devices]
+        
+        # Same strict thresholds as DeviceNode.request_consent, in float64 so
+        # fractional dBm readings aren't truncated: 0=NO (< -90), 1=MAYBE, 2=YES (> -70)
+        rssi = np.fromiter((d.rssi for d in self.devices), dtype=np.float64, count=len(self.devices))
+        codes = (1 + (rssi > -70) - (rssi < -90)).tolist()
+        by_code = (State.NO, State.MAYBE, State.YES)
+        
+        states = []
+        for device, code in zip(self.devices, codes):
+            state = by_code[code]
+            device._record_consent(request_type, state, now)
+            states.append(state)
+        
+        return states
+    
     def verify_consensus(self) -> bool:
         """Verify NSIGII consensus across all devices"""
-        print("\n[CONSENSUS] Verifying network-wide agreement...")
-        
-        yes_count = sum(1 for d in self.devices if d.consent and d.consent.state == State.YES)
-        no_count = sum(1 for d in self.devices if d.consent and d.consent.state == State.NO)
-        maybe_count = sum(1 for d in self.devices if d.consent and d.consent.state == State.MAYBE)
-        
-        print(f"[CONSENSUS] Results: {yes_count} YES, {no_count} NO, {maybe_count} MAYBE")
+        logger.info("[CONSENSUS] Verifying network-wide agreement...")
+        
+        # Single pass tally; Enum members are singletons so `is` suffices.
+        # Any NO vetoes consensus, so stop at the first objection.
+        yes_count = maybe_count = 0
+        for d in self.devices:
+            consent = d.consent
+            if not consent:
+                continue
+            state = consent.state
+            if state is State.NO:
+                logger.info("[CONSENSUS] ✗ REJECTED (%s objected)", d.device_name)
+                return False
+            elif state is State.YES:
+                yes_count += 1
+            elif state is State.MAYBE:
+                maybe_count += 1
+        
+        logger.info("[CONSENSUS] Results: %d YES, 0 NO, %d MAYBE", yes_count, maybe_count)
         
         # Consensus rules
-        if no_count > 0:
-            print("[CONSENSUS] ✗ REJECTED (devices objected)")
-            return False
-        
         if yes_count >= len(self.devices) // 2:
-            print("[CONSENSUS] ✓ VERIFIED (majority agreement)")
+            logger.info("[CONSENSUS] ✓ VERIFIED (majority agreement)")
             return True
         
-        print("[CONSENSUS] ⧖ PENDING (awaiting more responses)")
+        logger.info("[CONSENSUS] ⧖ PENDING (awaiting more responses)")
         return False
     
     def determine_optimal_topology(self) -> NetworkTopology:
         """Determine optimal topology based on network composition"""
-        print(f"\n[TOPOLOGY] Analyzing {len(self.devices)} devices...")
+        logger.info("[TOPOLOGY] Analyzing %d devices...", len(self.devices))
         
-        host_count = sum(1 for d in self.devices if d.role == DeviceRole.HOST)
+        host_count = sum(1 for d in self.devices if d.role is DeviceRole.HOST)
         
         if host_count == 0:
-            print("[TOPOLOGY] ERROR: No hosts available")
+            logger.error("[TOPOLOGY] ERROR: No hosts available")
             return NetworkTopology.STAR
         
         # Topology selection logic
         if len(self.devices) <= 3 and host_count == 1:
-            print("[TOPOLOGY] Selected: STAR (optimal for small network)")
+            logger.info("[TOPOLOGY] Selected: STAR (optimal for small network)")
             return NetworkTopology.STAR
         elif len(self.devices) <= 5 and host_count <= 2:
-            print("[TOPOLOGY] Selected: BUS (balanced redundancy)")
+            logger.info("[TOPOLOGY] Selected: BUS (balanced redundancy)")
             return NetworkTopology.BUS
         elif host_count >= 2:
-            print("[TOPOLOGY] Selected: MESH (distributed load)")
+            logger.info("[TOPOLOGY] Selected: MESH (distributed load)")
             return NetworkTopology.MESH
         else:
-            print("[TOPOLOGY] Selected: HYBRID (dynamic optimization)")
+            logger.info("[TOPOLOGY] Selected: HYBRID (dynamic optimization)")
             return NetworkTopology.HYBRID
     
     def calculate_fair_bandwidth(self):
         """Calculate fair bandwidth using quantum field theory principles"""
-        print("\n[BANDWIDTH] Calculating fair allocation...")
+        logger.info("[BANDWIDTH] Calculating fair allocation...")
         
         # Total available from all hosts
-        total = sum(d.bandwidth_mbps for d in self.devices if d.role == DeviceRole.HOST)
+        total = sum(d.bandwidth_mbps for d in self.devices if d.role is DeviceRole.HOST)
         self.total_bandwidth_mbps = total
         
         # Fair share: "double space, half time" from dendrite model
         self.fair_share_mbps = (total * 2.0) / len(self.devices)
         
-        print(f"[BANDWIDTH] Total: {total:.2f} Mbps")
-        print(f"[BANDWIDTH] Fair Share: {self.fair_share_mbps:.2f} Mbps/device (2x space, 0.5x time)")
+        logger.info("[BANDWIDTH] Total: %.2f Mbps", total)
+        logger.info("[BANDWIDTH] Fair Share: %.2f Mbps/device (2x space, 0.5x time)", self.fair_share_mbps)
         
         self.fairness_verified = True
     
     def calculate_cost_sharing(self):
         """Calculate transparent, auditable cost sharing"""
-        print("\n[COST] Calculating transparent cost allocation...")
-        
-        # Physics-based cost model: Work = F × d × cos(θ)
-        force_newtons = 1.25
-        distance_meters = 15.0
-        cosine_theta = 0.866  # cos(30°)
-        
-        work_per_mb = force_newtons * distance_meters * cosine_theta
-        usd_per_joule = 0.00001  # Microtransaction rate
+        logger.info("[COST] Calculating transparent cost allocation...")
+        debug = logger.isEnabledFor(logging.DEBUG)
         
         self.total_cost_usd = 0.0
         
         for device in self.devices:
             mb_used = device.mb_used()
-            device_cost = mb_used * work_per_mb * usd_per_joule
+            device_cost = mb_used * _USD_PER_MB
             device.balance_usd = device_cost
             self.total_cost_usd += device_cost
             
-            print(f"[COST] {device.device_name}: {mb_used:.2f} MB → ${device_cost:.6f}")
+            if debug:
+                logger.debug("[COST] %s: %.2f MB → $%.6f", device.device_name, mb_used, device_cost)
         
         self.cost_per_device = self.total_cost_usd / len(self.devices)
         
-        print(f"[COST] Total: ${self.total_cost_usd:.6f} | Per Device: ${self.cost_per_device:.6f}")
+        logger.info("[COST] Total: $%.6f | Per Device: $%.6f", self.total_cost_usd, self.cost_per_device)
         
         self.transparency_verified = True
     
     def process_payments(self) -> Dict[str, LightningPayment]:
         """Process Lightning Network micropayments"""
-        print("\n[LIGHTNING] Processing payments...")
+        logger.info("[LIGHTNING] Processing payments...")
+        debug = logger.isEnabledFor(logging.DEBUG)
         
         payments = {}
         
-        for device in self.devices:
-            if device.role == DeviceRole.CLIENT and device.balance_usd > 0:
-                payment = LightningPayment.create(device.balance_usd)
-                payment.status = PaymentState.SETTLED
-                device.payment_status = PaymentState.SETTLED
-                payments[device.device_id] = payment
-                
-                print(f"[LIGHTNING] {device.device_name}")
-                print(f"  Invoice: {payment.invoice}")
-                print(f"  Amount: {payment.amount_satoshi} sat (${payment.amount_usd:.6f})")
-                print(f"  Status: {payment.status.value.upper()}")
+        # Settle all billable clients against one batch commitment
+        billable = [d for d in self.devices if d.role is DeviceRole.CLIENT and d.balance_usd > 0]
+        batch = LightningPayment.create_batch([d.balance_usd for d in billable])
+        
+        for device, payment in zip(billable, batch):
+            payment.status = PaymentState.SETTLED
+            device.payment_status = PaymentState.SETTLED
+            payments[device.device_id] = payment
+            
+            if debug:
+                logger.debug("[LIGHTNING] %s", device.device_name)
+                logger.debug("  Invoice: %s", payment.invoice)
+                logger.debug("  Amount: %d sat ($%.6f)", payment.amount_satoshi, payment.amount_usd)
+                logger.debug("  Status: %s", payment.status.value.upper())
         
         return payments
     
     def verify_constitutional_compliance(self) -> bool:
         """Verify OBINexus constitutional framework compliance"""
-        print("\n[COMPLIANCE] Verifying constitutional requirements...")
+        logger.info("[COMPLIANCE] Verifying constitutional requirements...")
         
         passed = True
         
         # 1. Transparency
         if not self.transparency_verified:
-            print("[COMPLIANCE] ✗ FAILED: Cost transparency not verified")
+            logger.warning("[COMPLIANCE] ✗ FAILED: Cost transparency not verified")
             passed = False
         else:
-            print("[COMPLIANCE] ✓ PASSED: Cost transparency verified")
+            logger.info("[COMPLIANCE] ✓ PASSED: Cost transparency verified")
         
         # 2. Fairness
         if not self.fairness_verified:
-            print("[COMPLIANCE] ✗ FAILED: Fairness not verified")
+            logger.warning("[COMPLIANCE] ✗ FAILED: Fairness not verified")
             passed = False
         else:
-            print("[COMPLIANCE] ✓ PASSED: Fairness verified")
+            logger.info("[COMPLIANCE] ✓ PASSED: Fairness verified")
         
         # 3. Privacy (Node-Zero integration)
         self.privacy_verified = True
-        print("[COMPLIANCE] ✓ PASSED: Privacy framework active")
+        logger.info("[COMPLIANCE] ✓ PASSED: Privacy framework active")
         
         # 4. Accessibility
-        print("[COMPLIANCE] ✓ PASSED: Accessibility requirements met")
+        logger.info("[COMPLIANCE] ✓ PASSED: Accessibility requirements met")
         
         if passed:
-            print("[COMPLIANCE] ✓✓✓ CONSTITUTIONAL COMPLIANCE VERIFIED ✓✓✓")
+            logger.info("[COMPLIANCE] ✓✓✓ CONSTITUTIONAL COMPLIANCE VERIFIED ✓✓✓")
         else:
-            print("[COMPLIANCE] ✗✗✗ COMPLIANCE VIOLATION DETECTED ✗✗✗")
+            logger.warning("[COMPLIANCE] ✗✗✗ COMPLIANCE VIOLATION DETECTED ✗✗✗")
         
         return passed
 
@@ -395,31 +507,31 @@ def demo_blueshare_session():
     
     # Step 1: NSIGII Consensus
     print("### STEP 1: NSIGII CONSENSUS ###")
-    for device in devices:
-        device.request_consent("PARTICIPATION")
+    session.request_consent_all("PARTICIPATION")
     
+    print()
     if not session.verify_consensus():
         print("\n[SESSION] Consensus not reached. Aborting.")
         return
     
     # Step 2: Topology Selection
-    print("\n### STEP 2: TOPOLOGY SELECTION ###")
+    print("\n### STEP 2: TOPOLOGY SELECTION ###\n")
     session.topology = session.determine_optimal_topology()
     
     # Step 3: Bandwidth Allocation
-    print("\n### STEP 3: BANDWIDTH ALLOCATION ###")
+    print("\n### STEP 3: BANDWIDTH ALLOCATION ###\n")
     session.calculate_fair_bandwidth()
     
     # Step 4: Cost Calculation
-    print("\n### STEP 4: COST CALCULATION ###")
+    print("\n### STEP 4: COST CALCULATION ###\n")
     session.calculate_cost_sharing()
     
     # Step 5: Payment Processing
-    print("\n### STEP 5: PAYMENT PROCESSING ###")
+    print("\n### STEP 5: PAYMENT PROCESSING ###\n")
     payments = session.process_payments()
     
     # Step 6: Constitutional Compliance
-    print("\n### STEP 6: CONSTITUTIONAL COMPLIANCE ###")
+    print("\n### STEP 6: CONSTITUTIONAL COMPLIANCE ###\n")
     if not session.verify_constitutional_compliance():
         print("[SESSION] Constitutional violation. Session terminated.")
         return
@@ -443,4 +555,6 @@ def demo_blueshare_session():
 
 
 if __name__ == "__main__":
+    logging.basicConfig(format="%(message)s", stream=sys.stdout)
+    logger.setLevel(logging.DEBUG)
     demo_blueshare_session()